@@ -1,14 +1,17 @@
 """
 Endiba Quiz - Main Flask Application
 """
+import json
 import os
 import re
-from datetime import datetime, timedelta
-from functools import wraps
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, send_file
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from flask import Flask, g, render_template, request, jsonify, redirect, url_for, session, flash, send_file, stream_with_context
+from flask_caching import Cache
 from werkzeug.utils import secure_filename
+from sqlalchemy.orm import raiseload, selectinload
 import plotly.utils
-import pandas as pd
 
 from config import Config
 from models import db, Question, Option, Attempt, Response
@@ -26,12 +29,68 @@ app.config.from_object(Config)
 # Initialize database
 db.init_app(app)
 
+# Optional Redis set of completed IPs so landing/quiz/submit pages can
+# skip the DB existence check (see check_ip_completed)
+if Config.REDIS_URL:
+    import redis
+    redis_client = redis.Redis.from_url(Config.REDIS_URL)
+else:
+    redis_client = None
+
+COMPLETED_IPS_KEY = 'completed_ips'
+
+# Background worker for writes that should not block a response:
+# analytics counters from /submit and question imports from uploads
+background_executor = ThreadPoolExecutor(max_workers=2)
+
+# Result of the most recent background question import, served by
+# /admin/upload/status
+upload_status = {'state': 'idle', 'message': ''}
+
+# In-process cache for question data (questions only change on admin
+# upload/clear, so hot GET paths can skip the database)
+cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 300})
+
+
+def get_cached_questions():
+    """Get questions JSON, served from cache when available"""
+    questions = cache.get('questions_json')
+    if questions is None:
+        questions = get_questions_json()
+        cache.set('questions_json', questions)
+    return questions
+
+
+def get_questions_json_blob():
+    """Get the questions payload as pre-encoded JSON bytes
+
+    Built lazily on first use and kept on app.config until an upload or
+    clear invalidates it, so /api/questions serves raw bytes without a
+    DB fetch or per-request JSON encoding.
+    """
+    blob = app.config.get('QUESTIONS_JSON_CACHE')
+    if blob is None:
+        blob = json.dumps(get_cached_questions()).encode()
+        app.config['QUESTIONS_JSON_CACHE'] = blob
+    return blob
+
+
+def invalidate_question_cache():
+    """Drop cached question data after an upload or clear"""
+    cache.delete('questions_json')
+    cache.delete('question_count')
+    app.config['QUESTIONS_JSON_CACHE'] = None
+
 
 def get_client_ip():
-    """Get client IP address"""
-    if request.headers.get('X-Forwarded-For'):
-        return request.headers.get('X-Forwarded-For').split(',')[0].strip()
-    return request.remote_addr or '0.0.0.0'
+    """Get client IP address (parsed once per request, cached on g)"""
+    ip = g.get('client_ip')
+    if ip is None:
+        # access_route is X-Forwarded-For already split by Werkzeug
+        route = request.access_route
+        ip = route[0] if route else (request.remote_addr or '0.0.0.0')
+        g.client_ip = ip
+    return ip
 
 
 def admin_required(f):
@@ -48,9 +107,47 @@ def check_ip_completed(ip_address):
     """Check if IP has already completed the quiz"""
     if not Config.IP_LOCK_ENABLED:
         return False
-    
-    attempt = Attempt.query.filter_by(ip_address=ip_address).first()
-    return attempt is not None
+
+    # Redis set first: sub-millisecond and no DB round-trip
+    if redis_client is not None:
+        try:
+            if redis_client.sismember(COMPLETED_IPS_KEY, ip_address):
+                return True
+        except Exception:
+            pass  # Redis down; fall back to the DB
+
+    # Existence check on the indexed column only; no ORM row materialized
+    completed = db.session.query(
+        Attempt.id
+    ).filter_by(ip_address=ip_address).first() is not None
+
+    # Populate the set on a cache miss so the next check skips the DB
+    if completed:
+        mark_ip_completed(ip_address)
+
+    return completed
+
+
+def mark_ip_completed(ip_address):
+    """Record a completed IP in the Redis set (no-op without Redis)"""
+    if redis_client is not None:
+        try:
+            redis_client.sadd(COMPLETED_IPS_KEY, ip_address)
+        except Exception:
+            pass
+
+
+def clear_completed_ips():
+    """Drop the Redis completed-IP set (no-op without Redis)
+
+    Must accompany any attempt-table wipe, otherwise previously
+    completed IPs stay locked out of the new quiz.
+    """
+    if redis_client is not None:
+        try:
+            redis_client.delete(COMPLETED_IPS_KEY)
+        except Exception:
+            pass
 
 
 # ==================== PUBLIC ROUTES ====================
@@ -61,8 +158,11 @@ def index():
     ip = get_client_ip()
     has_completed = check_ip_completed(ip)
     
-    # Get total questions
-    question_count = Question.query.count()
+    # Get total questions (cached; changes only on upload/clear)
+    question_count = cache.get('question_count')
+    if question_count is None:
+        question_count = Question.query.count()
+        cache.set('question_count', question_count)
     
     return render_template('index.html', 
                          has_completed=has_completed,
@@ -79,14 +179,14 @@ def quiz():
         return redirect(url_for('already_completed'))
     
     # Get questions
-    questions = get_questions_json()
+    questions = get_cached_questions()
     
     if not questions:
         flash('No questions available. Please contact administrator.', 'error')
         return redirect(url_for('index'))
     
-    # Store quiz start time
-    session['quiz_start'] = datetime.utcnow().isoformat()
+    # Store quiz start time (epoch seconds; cheaper than ISO round-tripping)
+    session['quiz_start_ts'] = time.time()
     session['ip_address'] = ip
     
     return render_template('quiz.html', questions=questions)
@@ -102,10 +202,9 @@ def submit_quiz():
         return redirect(url_for('already_completed'))
     
     # Calculate time taken
-    quiz_start = session.get('quiz_start')
-    if quiz_start:
-        start_time = datetime.fromisoformat(quiz_start)
-        time_taken = int((datetime.utcnow() - start_time).total_seconds())
+    quiz_start_ts = session.get('quiz_start_ts')
+    if quiz_start_ts:
+        time_taken = max(int(time.time() - quiz_start_ts), 0)
     else:
         time_taken = 0
     
@@ -124,53 +223,79 @@ def submit_quiz():
     db.session.flush()
     
     responses_data = []
-    
+    response_mappings = []
+
+    # Fetch all answered questions and their options in two queries
+    question_ids = [int(qid) for qid in answers.keys() if str(qid).isdigit()]
+    questions = {
+        q.id: q for q in Question.query.options(
+            selectinload(Question.options), raiseload('*')
+        ).filter(Question.id.in_(question_ids)).all()
+    }
+
+    answered_ids = []
+    correct_ids = []
+    selected_pairs = []
+
     for question_id, selected_option in answers.items():
-        question = Question.query.get(int(question_id))
+        question = questions.get(int(question_id))
         if question:
-            is_correct = selected_option.upper() == question.correct_answer.upper()
+            # Normalize both labels once for the whole iteration
+            selected = selected_option.upper()
+            correct = question.correct_answer.upper()
+
+            is_correct = selected == correct
             if is_correct:
                 score += 1
-                question.correct_count += 1
-            
-            question.total_attempts += 1
-            
-            # Record option selection
-            option = Option.query.filter_by(
-                question_id=question.id,
-                label=selected_option.upper()
-            ).first()
-            if option:
-                option.selection_count += 1
-            
-            # Create response record
-            response = Response(
-                attempt_id=attempt.id,
-                question_id=question.id,
-                selected_option=selected_option.upper(),
-                is_correct=is_correct
+                correct_ids.append(question.id)
+
+            answered_ids.append(question.id)
+
+            # Record option selection (options are already loaded)
+            option = next(
+                (opt for opt in question.options if opt.label == selected),
+                None
             )
-            db.session.add(response)
-            
+            if option:
+                selected_pairs.append((question.id, option.label))
+
+            # Stage response record for a single bulk INSERT after the loop
+            response_mappings.append({
+                'attempt_id': attempt.id,
+                'question_id': question.id,
+                'selected_option': selected,
+                'is_correct': is_correct
+            })
+
             responses_data.append({
                 'question_id': question.id,
                 'question_number': question.question_number,
                 'question_body': question.body,
-                'selected_option': selected_option.upper(),
+                'selected_option': selected,
                 'correct_option': question.correct_answer,
                 'is_correct': is_correct,
                 'options': [{
                     'label': opt.label,
                     'text': opt.text,
-                    'is_selected': opt.label == selected_option.upper(),
+                    'is_selected': opt.label == selected,
                     'is_correct': opt.label == question.correct_answer
                 } for opt in question.options]
             })
     
-    # Update attempt score
+    # Insert all responses in one round-trip and update attempt score
+    if response_mappings:
+        db.session.bulk_insert_mappings(Response, response_mappings)
     attempt.score = score
     db.session.commit()
-    
+
+    mark_ip_completed(ip)
+
+    # Counter increments are analytics-only; apply them off the request
+    # thread so the client sees the result immediately
+    background_executor.submit(
+        _apply_answer_stats, answered_ids, correct_ids, selected_pairs
+    )
+
     # Determine score color
     if score <= 3:
         score_color = 'red'
@@ -189,6 +314,41 @@ def submit_quiz():
     })
 
 
+def _apply_answer_stats(answered_ids, correct_ids, selected_pairs):
+    """Increment question/option counters with bulk UPDATEs
+
+    Runs on the stats executor with its own app context and session;
+    failures are logged rather than surfaced to the submitter.
+    """
+    with app.app_context():
+        try:
+            if answered_ids:
+                db.session.execute(
+                    db.update(Question)
+                    .where(Question.id.in_(answered_ids))
+                    .values(total_attempts=Question.total_attempts + 1)
+                    .execution_options(synchronize_session=False)
+                )
+            if correct_ids:
+                db.session.execute(
+                    db.update(Question)
+                    .where(Question.id.in_(correct_ids))
+                    .values(correct_count=Question.correct_count + 1)
+                    .execution_options(synchronize_session=False)
+                )
+            if selected_pairs:
+                db.session.execute(
+                    db.update(Option)
+                    .where(db.tuple_(Option.question_id, Option.label).in_(selected_pairs))
+                    .values(selection_count=Option.selection_count + 1)
+                    .execution_options(synchronize_session=False)
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('Failed to apply answer statistics')
+
+
 @app.route('/result')
 def result():
     """Result page"""
@@ -235,21 +395,19 @@ def admin_logout():
 @admin_required
 def admin_dashboard():
     """Admin dashboard with statistics"""
-    # Get basic stats
-    total_attempts = Attempt.query.count()
-    completed_quiz = Attempt.query.count()
+    # Get basic stats: attempt count and average time in one round-trip
+    total_attempts, avg_time_result = db.session.query(
+        db.func.count(Attempt.id),
+        db.func.avg(Attempt.time_taken)
+    ).one()
+    avg_time = int(avg_time_result) if avg_time_result else 0
+    completed_quiz = total_attempts
     total_clicks = completed_quiz + (session.get('quiz_started_count', 0))
-    
+
     # Calculate completion rate
     started_quiz = total_clicks
     completion_rate = (completed_quiz / started_quiz * 100) if started_quiz > 0 else 0
     
-    # Average time
-    avg_time_result = db.session.query(
-        db.func.avg(Attempt.time_taken)
-    ).scalar()
-    avg_time = int(avg_time_result) if avg_time_result else 0
-    
     # Hourly activity data
     engine = db.session.bind
     dialect = engine.dialect.name if engine is not None else None
@@ -273,8 +431,9 @@ def admin_dashboard():
     # Hourly activity chart
     hourly_chart = create_hourly_chart(hours)
     
-    # Most answered correctly
-    most_correct = Question.query.order_by(
+    # Most answered correctly (raiseload guards against accidental
+    # lazy-loads creeping back into the dashboard)
+    most_correct = Question.query.options(raiseload('*')).order_by(
         Question.correct_count.desc()
     ).limit(5).all()
     
@@ -288,16 +447,16 @@ def admin_dashboard():
         for q in most_correct
     ]
     
-    # Most answered wrongly (by wrong percentage)
-    questions_with_wrong = [
-        q for q in Question.query.all() 
-        if q.total_attempts > 0 and q.wrong_percentage > 0
-    ]
-    most_wrong = sorted(
-        questions_with_wrong, 
-        key=lambda x: x.wrong_percentage, 
-        reverse=True
-    )[:5]
+    # Most answered wrongly (by wrong percentage), sorted in the database
+    # instead of scanning every question in Python
+    wrong_ratio = (
+        (Question.total_attempts - Question.correct_count) * 1.0 /
+        db.func.nullif(Question.total_attempts, 0)
+    )
+    most_wrong = Question.query.options(raiseload('*')).filter(
+        Question.total_attempts > 0,
+        Question.total_attempts > Question.correct_count
+    ).order_by(wrong_ratio.desc()).limit(5).all()
     
     most_wrong_data = [
         {
@@ -309,11 +468,14 @@ def admin_dashboard():
         for q in most_wrong
     ]
     
-    # Per-question statistics
+    # Per-question statistics (options eager-loaded in one extra query)
     question_stats = []
-    for q in Question.query.order_by(Question.question_number).all():
+    all_questions = Question.query.options(
+        selectinload(Question.options), raiseload('*')
+    ).order_by(Question.question_number).all()
+    for q in all_questions:
         option_stats = []
-        for opt in sorted(q.options, key=lambda x: x.label):
+        for opt in q.options:
             option_stats.append({
                 'label': opt.label,
                 'text': opt.text,
@@ -331,11 +493,15 @@ def admin_dashboard():
             'options': option_stats
         })
     
-    # Score distribution
-    score_distribution = []
-    for i in range(11):
-        count = Attempt.query.filter_by(score=i).count()
-        score_distribution.append({'score': i, 'count': count})
+    # Score distribution in a single GROUP BY instead of 11 COUNT queries
+    score_counts = dict(
+        db.session.query(
+            Attempt.score, db.func.count(Attempt.id)
+        ).group_by(Attempt.score).all()
+    )
+    score_distribution = [
+        {'score': i, 'count': score_counts.get(i, 0)} for i in range(11)
+    ]
     
     score_chart = create_score_chart(score_distribution)
     
@@ -353,64 +519,72 @@ def admin_dashboard():
 
 
 def create_hourly_chart(hours):
-    """Create hourly activity chart using Plotly"""
-    import plotly.express as px
+    """Create hourly activity chart using Plotly (cached per input)"""
+    return _hourly_chart_cached(tuple(hours))
+
+
+@lru_cache(maxsize=32)
+def _hourly_chart_cached(hours):
+    """Build and JSON-encode the hourly chart for a given hours tuple"""
     import plotly.graph_objects as go
-    
-    df = pd.DataFrame({'Hour': range(24), 'Attempts': hours})
-    
-    fig = px.bar(
-        df, 
-        x='Hour', 
-        y='Attempts',
-        title='Quiz Activity by Hour of Day',
-        labels={'Hour': 'Hour (0-23)', 'Attempts': 'Number of Attempts'},
-        color='Attempts',
-        color_continuous_scale='Blues'
-    )
-    
+
+    fig = go.Figure(go.Bar(
+        x=list(range(24)),
+        y=list(hours),
+        marker=dict(color=list(hours), colorscale='Blues')
+    ))
+
     fig.update_layout(
+        title='Quiz Activity by Hour of Day',
+        xaxis_title='Hour (0-23)',
+        yaxis_title='Number of Attempts',
         xaxis=dict(tickmode='linear', tick0=0, dtick=1),
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
         font=dict(family="Inter, sans-serif")
     )
-    
+
     return plotly.utils.PlotlyJSONEncoder().encode(fig)
 
 
 def create_score_chart(distribution):
-    """Create score distribution chart using Plotly"""
-    import plotly.express as px
-    
-    df = pd.DataFrame(distribution)
-    
+    """Create score distribution chart using Plotly (cached per input)"""
+    return _score_chart_cached(
+        tuple((d['score'], d['count']) for d in distribution)
+    )
+
+
+@lru_cache(maxsize=32)
+def _score_chart_cached(distribution):
+    """Build and JSON-encode the score chart for a distribution tuple"""
+    import plotly.graph_objects as go
+
     # Color based on score
     colors = []
-    for s in df['score']:
+    for s, _ in distribution:
         if s <= 3:
             colors.append('#EF4444')  # Red
         elif s <= 6:
             colors.append('#F59E0B')  # Orange
         else:
             colors.append('#10B981')  # Green
-    
-    fig = px.bar(
-        df,
-        x='score',
-        y='count',
-        title='Score Distribution',
-        labels={'score': 'Score', 'count': 'Number of Users'},
-        color_discrete_sequence=colors
-    )
-    
+
+    fig = go.Figure(go.Bar(
+        x=[s for s, _ in distribution],
+        y=[c for _, c in distribution],
+        marker_color=colors
+    ))
+
     fig.update_layout(
+        title='Score Distribution',
+        xaxis_title='Score',
+        yaxis_title='Number of Users',
         xaxis=dict(tickmode='linear', tick0=0, dtick=1),
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
         font=dict(family="Inter, sans-serif")
     )
-    
+
     return plotly.utils.PlotlyJSONEncoder().encode(fig)
 
 
@@ -445,16 +619,41 @@ def admin_upload():
                 flash(f'No questions found in document. Errors: {"; ".join(parse_errors)}', 'error')
                 return redirect(request.url)
             
-            # Save to database
-            success_count, error_count, save_errors = save_questions_to_db(questions_data)
-            
-            # Clean up uploaded file
+            # Clean up uploaded file (parsing is done; the data is in memory)
             try:
                 os.remove(filepath)
             except:
                 pass
-            
-            # Prepare message
+
+            # Persist off the request thread; the DB commit no longer
+            # blocks the upload response
+            upload_status.update(state='running', message='Import in progress')
+            background_executor.submit(
+                _persist_questions, questions_data, parse_errors
+            )
+
+            flash(
+                f'Parsed {len(questions_data)} questions; import running in background',
+                'success'
+            )
+            return redirect(url_for('admin_dashboard'))
+        else:
+            flash('Invalid file type. Please upload a .docx file', 'error')
+    
+    return render_template('admin/upload.html')
+
+
+def _persist_questions(questions_data, parse_errors):
+    """Save parsed questions on the background executor
+
+    Runs with its own app context; the outcome message is published via
+    upload_status for /admin/upload/status.
+    """
+    with app.app_context():
+        try:
+            success_count, error_count, save_errors = save_questions_to_db(questions_data)
+            invalidate_question_cache()
+
             messages = []
             if success_count > 0:
                 messages.append(f'Successfully imported {success_count} questions')
@@ -464,18 +663,21 @@ def admin_upload():
                 messages.append(f'Parse errors: {"; ".join(parse_errors[:5])}')
             if save_errors:
                 messages.append(f'Save errors: {"; ".join(save_errors[:5])}')
-            
-            message = '; '.join(messages)
-            if error_count == 0:
-                flash(message, 'success')
-            else:
-                flash(message, 'warning')
-            
-            return redirect(url_for('admin_dashboard'))
-        else:
-            flash('Invalid file type. Please upload a .docx file', 'error')
-    
-    return render_template('admin/upload.html')
+
+            upload_status.update(
+                state='done' if error_count == 0 else 'done_with_errors',
+                message='; '.join(messages)
+            )
+        except Exception as e:
+            app.logger.exception('Background question import failed')
+            upload_status.update(state='failed', message=str(e))
+
+
+@app.route('/admin/upload/status')
+@admin_required
+def admin_upload_status():
+    """Status of the most recent background question import"""
+    return jsonify(upload_status)
 
 
 @app.route('/admin/clear', methods=['POST'])
@@ -483,6 +685,8 @@ def admin_upload():
 def admin_clear():
     """Clear all quiz data"""
     success, errors = clear_all_questions()
+    invalidate_question_cache()
+    clear_completed_ips()
     
     if success:
         flash('All quiz data cleared successfully', 'success')
@@ -496,16 +700,17 @@ def admin_clear():
 @admin_required
 def admin_export():
     """Export quiz data as CSV"""
-    attempts = Attempt.query.order_by(Attempt.timestamp.desc()).all()
-    
-    csv_data = 'IP Address,Score,Time Taken (s),Timestamp\n'
-    for a in attempts:
-        csv_data += f'{a.ip_address},{a.score},{a.time_taken},{a.timestamp}\n'
-    
-    return csv_data, 200, {
-        'Content-Type': 'text/csv',
-        'Content-Disposition': 'attachment; filename=quiz_results.csv'
-    }
+    def generate():
+        yield 'IP Address,Score,Time Taken (s),Timestamp\n'
+        query = db.session.query(Attempt).order_by(Attempt.timestamp.desc())
+        for a in query.yield_per(1000):
+            yield f'{a.ip_address},{a.score},{a.time_taken},{a.timestamp}\n'
+
+    return app.response_class(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=quiz_results.csv'}
+    )
 
 
 # ==================== API ROUTES ====================
@@ -513,17 +718,18 @@ def admin_export():
 @app.route('/api/questions')
 def api_questions():
     """API endpoint to get questions"""
-    questions = get_questions_json()
-    return jsonify(questions)
+    return app.response_class(
+        get_questions_json_blob(), mimetype='application/json'
+    )
 
 
 @app.route('/api/stats')
 def api_stats():
     """API endpoint for quick stats"""
-    total_attempts = Attempt.query.count()
-    avg_time_result = db.session.query(
+    total_attempts, avg_time_result = db.session.query(
+        db.func.count(Attempt.id),
         db.func.avg(Attempt.time_taken)
-    ).scalar()
+    ).one()
     avg_time = int(avg_time_result) if avg_time_result else 0
     
     return jsonify({
@@ -11,6 +11,24 @@ class Config:
     # Database configuration
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI') or 'sqlite:///endiba_quiz.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool settings (server databases only; sqlite dev uses
+    # a file-level lock and gains nothing from pooling)
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_pre_ping': True,
+            'pool_recycle': 1800,
+        }
+
+        # DBAPI-level batching so bulk inserts go out as multi-row
+        # statements instead of one round-trip per row
+        if SQLALCHEMY_DATABASE_URI.startswith('postgresql'):
+            SQLALCHEMY_ENGINE_OPTIONS['executemany_mode'] = 'values_plus_batch'
+            SQLALCHEMY_ENGINE_OPTIONS['executemany_values_page_size'] = 1000
+        elif SQLALCHEMY_DATABASE_URI.startswith('mssql'):
+            SQLALCHEMY_ENGINE_OPTIONS['fast_executemany'] = True
     
     # Upload folder for Word documents
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads')
@@ -19,6 +37,9 @@ class Config:
     # Quiz settings
     QUESTIONS_PER_QUIZ = 10
     IP_LOCK_ENABLED = True
+
+    # Optional Redis for the completed-IP set (falls back to the DB when unset)
+    REDIS_URL = os.environ.get('REDIS_URL')
     
     # Admin credentials (in production, use environment variables)
     ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME') or 'admin'
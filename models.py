@@ -9,13 +9,27 @@ db = SQLAlchemy()
 
 class Question(db.Model):
     """Question model storing quiz questions"""
+    __table_args__ = (
+        # Serves the dashboard's ORDER BY correct_count DESC LIMIT 5;
+        # question_number already has an index via its unique constraint
+        db.Index('ix_question_correct_count', db.desc('correct_count')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     question_number = db.Column(db.Integer, unique=True, nullable=False)
     body = db.Column(db.Text, nullable=False)
     correct_answer = db.Column(db.String(1), nullable=False)  # A, B, C, or D
     
-    # Relationship to options
-    options = db.relationship('Option', backref='question', lazy=True, cascade='all, delete-orphan')
+    # Relationship to options: batch-loaded with the questions and
+    # returned already ordered by label, so callers never sort or
+    # lazy-load per question
+    options = db.relationship(
+        'Option',
+        backref='question',
+        lazy='selectin',
+        order_by='Option.label',
+        cascade='all, delete-orphan'
+    )
     
     # Statistics (calculated on the fly)
     total_attempts = db.Column(db.Integer, default=0)
@@ -38,9 +52,24 @@ class Question(db.Model):
             return 0
         return 100 - self.correct_percentage
 
+    @classmethod
+    def bulk_create(cls, mappings):
+        """Insert many questions in one batched statement
+
+        Fills the generated ids back into the mapping dicts so option
+        rows can reference them. Caller is responsible for commit.
+        """
+        db.session.bulk_insert_mappings(cls, mappings, return_defaults=True)
+        db.session.flush()
+        return mappings
+
 
 class Option(db.Model):
     """Option model storing answer choices for each question"""
+    __table_args__ = (
+        db.Index('ix_option_qid_label', 'question_id', 'label', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
     label = db.Column(db.String(1), nullable=False)  # A, B, C, or D
@@ -48,10 +77,20 @@ class Option(db.Model):
     
     # Statistics
     selection_count = db.Column(db.Integer, default=0)
-    
+
     def __repr__(self):
         return f'<Option {self.label}: {self.text[:30]}...>'
 
+    @classmethod
+    def bulk_create(cls, mappings):
+        """Insert many options in one batched statement
+
+        Mappings must already carry question_id. Caller is responsible
+        for commit.
+        """
+        db.session.bulk_insert_mappings(cls, mappings)
+        db.session.flush()
+
 
 class Attempt(db.Model):
     """Attempt model tracking quiz completions"""
@@ -70,6 +109,10 @@ class Attempt(db.Model):
 
 class Response(db.Model):
     """Response model storing individual answer selections"""
+    __table_args__ = (
+        db.Index('ix_response_aid_qid', 'attempt_id', 'question_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     attempt_id = db.Column(db.Integer, db.ForeignKey('attempt.id'), nullable=False)
     question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
@@ -2,21 +2,148 @@
 Word Document Parser for Endiba Quiz
 Parses questions from .docx files with specific format
 """
+import hashlib
+import io
 import re
-from docx import Document
-from models import Question, Option, db
+import threading
+import zipfile
+from itertools import groupby, islice
+from lxml import etree
+from models import Question, Option, Attempt, Response, db
+
+# Parse results keyed by document content hash, so re-uploading the
+# same file skips the parse
+_PARSE_CACHE = {}
+_PARSE_CACHE_MAX = 8
+
+# Memoized get_questions_json result; questions only change via
+# save_questions_to_db / clear_all_questions, which reset it
+_QUESTIONS_CACHE = {'data': None}
+_QUESTIONS_CACHE_LOCK = threading.Lock()
+
+
+def _invalidate_questions_cache():
+    """Drop the memoized questions list after a write"""
+    with _QUESTIONS_CACHE_LOCK:
+        _QUESTIONS_CACHE['data'] = None
+
+# Compiled once at import; one combined alternation classifies every
+# paragraph in a single regex scan. Exactly one branch can match:
+# qn/qb for a question line, qn/qa for an answer line, ol/ot for an
+# option line.
+_LINE_RE = re.compile(
+    r'^(?:Question\s+(?P<qn>\d+)(?::\s*(?P<qb>.+)|\s+Answer:\s*(?P<qa>[A-D]))'
+    r'|(?P<ol>[A-D])\.\s*(?P<ot>.+))\s*$',
+    re.IGNORECASE
+)
+
+# Labels are a closed set of eight possible inputs; a dict lookup
+# canonicalizes them without allocating a fresh string per .upper()
+_LABEL_MAP = {c: c for c in 'ABCD'}
+_LABEL_MAP.update({c.lower(): c for c in 'ABCD'})
+
+# WordprocessingML tags used to read paragraph text straight from the
+# document XML, skipping python-docx's Paragraph/Run wrappers
+_WORD_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_P_TAG = f'{{{_WORD_NS}}}p'
+_T_TAG = f'{{{_WORD_NS}}}t'
+
+
+def _iter_paragraph_text(docx_source):
+    """
+    Yield stripped, non-empty paragraph text from a .docx path or buffer
+
+    Streams word/document.xml out of the zip with iterparse and frees
+    each paragraph element after yielding, so peak memory stays at one
+    paragraph instead of the whole document tree.
+    """
+    with zipfile.ZipFile(docx_source) as z, z.open('word/document.xml') as f:
+        for _, p in etree.iterparse(f, tag=_P_TAG):
+            text = ''.join(t.text or '' for t in p.iter(_T_TAG)).strip()
+            if text:
+                yield text
+            p.clear()
+            while p.getprevious() is not None:
+                del p.getparent()[0]
 
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
-    ALLOWED_EXTENSIONS = {'docx'}
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith('.docx')
+
+
+def _flush_question(question, options, answer, errors):
+    """
+    Finalize a pending question dict before it is emitted
+
+    Attaches the collected options, sets the answer when the question
+    is complete, and records missing-answer/missing-options problems.
+    """
+    if answer is None:
+        errors.append(f"Question {question['number']} missing answer")
+    elif len(options) < 4:
+        errors.append(f"Question {question['number']} missing options")
+    else:
+        question['answer'] = answer
+    question['options'] = options
+    return question
+
+
+def iter_questions(paragraphs, errors):
+    """
+    Stream completed question dicts from an iterable of paragraph text
+
+    Pure state machine: each question is yielded as soon as the next
+    one begins (or the input ends), so consumers can process arbitrarily
+    large documents without materializing every question. Format
+    problems are appended to the supplied errors list.
+    """
+    current_question = None
+    current_options = {}
+    current_answer = None
+
+    for para in paragraphs:
+        # One combined regex scan classifies the line; a first-character
+        # check lets prose paragraphs skip even that
+        match = _LINE_RE.match(para) if para[0] in 'ABCDQabcdq' else None
+
+        if match is None:
+            # Non-empty paragraph that doesn't match any pattern
+            if not para.startswith('#') and current_question is not None:
+                errors.append(f"Unexpected line in Question {current_question['number']}: {para[:50]}...")
+
+        elif match.group('qb') is not None:
+            # Question line: flush any pending question first
+            if current_question is not None:
+                yield _flush_question(
+                    current_question, current_options, current_answer, errors
+                )
+
+            current_question = {
+                'number': int(match.group('qn')),
+                'body': match.group('qb').strip()
+            }
+            current_options = {}
+            current_answer = None
+
+        elif match.group('ol') is not None and current_question is not None:
+            label = _LABEL_MAP[match.group('ol')]
+            current_options[label] = match.group('ot').strip()
+
+        elif match.group('qa') is not None and current_question is not None:
+            current_answer = _LABEL_MAP[match.group('qa')]
+
+    # Don't forget the last question
+    if current_question is not None:
+        yield _flush_question(
+            current_question, current_options, current_answer, errors
+        )
 
 
 def parse_quiz_document(docx_path):
     """
     Parse a Word document and extract quiz questions
-    
+
     Expected format:
     Question x: <question body>
     A. <option A>
@@ -24,201 +151,251 @@ def parse_quiz_document(docx_path):
     C. <option C>
     D. <option D>
     Question x Answer: <A/B/C/D>
-    
+
+    Results are memoized on the file's content hash, so re-uploading an
+    identical document skips the parse entirely.
+
     Returns:
         tuple: (questions_data, errors)
     """
-    questions_data = []
     errors = []
-    
     try:
-        doc = Document(docx_path)
-        paragraphs = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
-        
-        current_question = None
-        current_options = {}
-        current_answer = None
-        
-        for i, para in enumerate(paragraphs):
-            # Match question pattern
-            question_match = re.match(r'^Question\s+(\d+):\s*(.+)$', para, re.IGNORECASE)
-            
-            # Match option pattern
-            option_match = re.match(r'^([A-D])\.\s*(.+)$', para, re.IGNORECASE)
-            
-            # Match answer pattern
-            answer_match = re.match(r'^Question\s+\d+\s+Answer:\s*([A-D])$', para, re.IGNORECASE)
-            
-            if question_match:
-                # If we have a previous question pending, save it
-                if current_question is not None:
-                    if current_answer is None:
-                        errors.append(f"Question {current_question['number']} missing answer")
-                        current_question['options'] = current_options
-                        questions_data.append(current_question)
-                    elif len(current_options) < 4:
-                        errors.append(f"Question {current_question['number']} missing options")
-                        current_question['options'] = current_options
-                        questions_data.append(current_question)
-                    else:
-                        current_question['options'] = current_options
-                        current_question['answer'] = current_answer
-                        questions_data.append(current_question)
-                
-                # Start new question
-                current_question = {
-                    'number': int(question_match.group(1)),
-                    'body': question_match.group(2).strip()
-                }
-                current_options = {}
-                current_answer = None
-                
-            elif option_match and current_question is not None:
-                label = option_match.group(1).upper()
-                text = option_match.group(2).strip()
-                current_options[label] = text
-                
-            elif answer_match and current_question is not None:
-                current_answer = answer_match.group(1).upper()
-                
-            elif para and not para.startswith('#'):
-                # Non-empty paragraph that doesn't match any pattern
-                if current_question is not None:
-                    errors.append(f"Unexpected line in Question {current_question['number']}: {para[:50]}...")
-        
-        # Don't forget the last question
-        if current_question is not None:
-            if current_answer is None:
-                errors.append(f"Question {current_question['number']} missing answer")
-                current_question['options'] = current_options
-                questions_data.append(current_question)
-            elif len(current_options) < 4:
-                errors.append(f"Question {current_question['number']} missing options")
-                current_question['options'] = current_options
-                questions_data.append(current_question)
-            else:
-                current_question['options'] = current_options
-                current_question['answer'] = current_answer
-                questions_data.append(current_question)
-        
+        with open(docx_path, 'rb') as f:
+            file_bytes = f.read()
+
+        digest = hashlib.sha1(file_bytes).hexdigest()
+        cached = _PARSE_CACHE.get(digest)
+        if cached is not None:
+            return cached
+
+        questions_data = list(
+            iter_questions(_iter_paragraph_text(io.BytesIO(file_bytes)), errors)
+        )
+
+        # Tiny FIFO eviction; uploads are rare and small
+        if len(_PARSE_CACHE) >= _PARSE_CACHE_MAX:
+            _PARSE_CACHE.pop(next(iter(_PARSE_CACHE)))
+        _PARSE_CACHE[digest] = (questions_data, errors)
+
         return questions_data, errors
-        
     except Exception as e:
         errors.append(f"Error parsing document: {str(e)}")
         return [], errors
 
 
+# How many parsed questions to stage per batch when saving
+_SAVE_BATCH_SIZE = 500
+
+
+def _save_question_batch(batch, errors):
+    """
+    Stage one batch of parsed questions on the session (no commit)
+
+    Returns:
+        tuple: (success_count, error_count)
+    """
+    success_count = 0
+    error_count = 0
+
+    # Fetch the batch's existing questions in one query
+    numbers = [q_data['number'] for q_data in batch]
+    existing_questions = {
+        q.question_number: q
+        for q in Question.query.filter(Question.question_number.in_(numbers)).all()
+    }
+
+    # ... and their options, keyed by (question_id, label), so the
+    # update branch never queries per option
+    existing_options = {}
+    if existing_questions:
+        question_ids = [q.id for q in existing_questions.values()]
+        existing_options = {
+            (o.question_id, o.label): o
+            for o in Option.query.filter(Option.question_id.in_(question_ids)).all()
+        }
+
+    new_question_mappings = []
+    staged_by_number = {}
+    new_options_by_number = {}
+
+    # no_autoflush keeps the prefetched state stable (no implicit flush
+    # per staged row); a SAVEPOINT per question confines failures to
+    # that question instead of poisoning the whole batch
+    with db.session.no_autoflush:
+        for q_data in batch:
+            savepoint = db.session.begin_nested()
+            try:
+                existing = existing_questions.get(q_data['number'])
+                if existing:
+                    # Update existing question
+                    existing.body = q_data['body']
+                    existing.correct_answer = q_data['answer']
+
+                    # Update options
+                    for label, text in q_data['options'].items():
+                        option = existing_options.get((existing.id, label))
+                        if option:
+                            option.text = text
+                        else:
+                            new_option = Option(
+                                question_id=existing.id,
+                                label=label,
+                                text=text
+                            )
+                            db.session.add(new_option)
+                else:
+                    staged = staged_by_number.get(q_data['number'])
+                    if staged is not None:
+                        # Number repeated within the batch: overwrite the
+                        # staged row (last wins, as when each row was
+                        # resolved against the session) instead of letting
+                        # bulk_create trip the unique constraint and void
+                        # the whole import
+                        staged['body'] = q_data['body']
+                        staged['correct_answer'] = q_data['answer']
+                    else:
+                        # Stage new question and options for one batched
+                        # INSERT per table after the loop
+                        staged = {
+                            'question_number': q_data['number'],
+                            'body': q_data['body'],
+                            'correct_answer': q_data['answer']
+                        }
+                        new_question_mappings.append(staged)
+                        staged_by_number[q_data['number']] = staged
+                    new_options_by_number[q_data['number']] = q_data['options']
+
+                savepoint.commit()
+                success_count += 1
+
+            except Exception as e:
+                savepoint.rollback()
+                error_count += 1
+                errors.append(f"Error saving Question {q_data['number']}: {str(e)}")
+
+    if new_question_mappings:
+        Question.bulk_create(new_question_mappings)
+        id_by_number = {
+            m['question_number']: m['id'] for m in new_question_mappings
+        }
+        option_mappings = [
+            {'question_id': id_by_number[number], 'label': label, 'text': text}
+            for number, options in new_options_by_number.items()
+            for label, text in options.items()
+        ]
+        if option_mappings:
+            Option.bulk_create(option_mappings)
+
+    return success_count, error_count
+
+
 def save_questions_to_db(questions_data):
     """
     Save parsed questions to database
-    
+
     Args:
-        questions_data: List of question dictionaries
-        
+        questions_data: Iterable of question dictionaries; generators
+            (e.g. iter_questions) are consumed lazily in batches, so
+            large documents never materialize in full
+
     Returns:
         tuple: (success_count, error_count, errors)
     """
     success_count = 0
     error_count = 0
     errors = []
-    
-    for q_data in questions_data:
-        try:
-            # Check if question already exists
-            existing = Question.query.filter_by(question_number=q_data['number']).first()
-            if existing:
-                # Update existing question
-                existing.body = q_data['body']
-                existing.correct_answer = q_data['answer']
-                
-                # Update options
-                for label, text in q_data['options'].items():
-                    option = Option.query.filter_by(
-                        question_id=existing.id, 
-                        label=label
-                    ).first()
-                    if option:
-                        option.text = text
-                    else:
-                        new_option = Option(
-                            question_id=existing.id,
-                            label=label,
-                            text=text
-                        )
-                        db.session.add(new_option)
-            else:
-                # Create new question
-                new_question = Question(
-                    question_number=q_data['number'],
-                    body=q_data['body'],
-                    correct_answer=q_data['answer']
-                )
-                db.session.add(new_question)
-                db.session.flush()  # Get the ID
-                
-                # Create options
-                for label, text in q_data['options'].items():
-                    new_option = Option(
-                        question_id=new_question.id,
-                        label=label,
-                        text=text
-                    )
-                    db.session.add(new_option)
-            
-            success_count += 1
-            
-        except Exception as e:
-            error_count += 1
-            errors.append(f"Error saving Question {q_data['number']}: {str(e)}")
-    
+    processed = 0
+
+    questions_iter = iter(questions_data)
     try:
+        while True:
+            batch = list(islice(questions_iter, _SAVE_BATCH_SIZE))
+            if not batch:
+                break
+            processed += len(batch)
+            batch_success, batch_errors = _save_question_batch(batch, errors)
+            success_count += batch_success
+            error_count += batch_errors
+
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         errors.append(f"Database commit error: {str(e)}")
-        error_count = len(questions_data)
+        error_count = processed
         success_count = 0
-    
+
+    _invalidate_questions_cache()
     return success_count, error_count, errors
 
 
 def get_questions_json():
     """
-    Get all questions in JSON format for frontend
-    
+    Get all questions in JSON format for frontend (memoized until the
+    next upload or clear)
+
     Returns:
         list: List of question dictionaries
     """
-    questions = Question.query.order_by(Question.question_number).all()
-    
+    cached = _QUESTIONS_CACHE['data']
+    if cached is not None:
+        return cached
+
+    # One joined column query; no ORM objects are materialized, the
+    # rows are grouped into dicts in a single ordered pass
+    rows = db.session.execute(
+        db.select(
+            Question.id,
+            Question.question_number,
+            Question.body,
+            Question.correct_answer,
+            Option.label,
+            Option.text
+        )
+        .outerjoin(Option, Option.question_id == Question.id)
+        .order_by(Question.question_number, Option.label)
+    ).all()
+
     questions_data = []
-    for q in questions:
-        options = []
-        for opt in sorted(q.options, key=lambda x: x.label):
-            options.append({
-                'label': opt.label,
-                'text': opt.text
-            })
-        
+    for (qid, number, body, answer), q_rows in groupby(
+        rows, key=lambda r: (r[0], r[1], r[2], r[3])
+    ):
         questions_data.append({
-            'id': q.id,
-            'number': q.question_number,
-            'body': q.body,
-            'correct_answer': q.correct_answer,
-            'options': options
+            'id': qid,
+            'number': number,
+            'body': body,
+            'correct_answer': answer,
+            'options': [
+                {'label': label, 'text': text}
+                for _, _, _, _, label, text in q_rows
+                if label is not None
+            ]
         })
-    
+
+    with _QUESTIONS_CACHE_LOCK:
+        _QUESTIONS_CACHE['data'] = questions_data
     return questions_data
 
 
 def clear_all_questions():
-    """Clear all questions and options from database"""
+    """Clear all quiz data (questions, options, attempts, responses)"""
+    # Child tables first so the plain-DELETE path satisfies foreign keys
+    tables = [
+        Response.__table__, Attempt.__table__,
+        Option.__table__, Question.__table__
+    ]
     try:
-        db.session.query(Response).delete()
-        db.session.query(Attempt).delete()
-        db.session.query(Option).delete()
-        db.session.query(Question).delete()
+        if db.engine.dialect.name == 'postgresql':
+            # O(1) metadata operation; also resets the id sequences
+            db.session.execute(db.text(
+                'TRUNCATE {} RESTART IDENTITY CASCADE'.format(
+                    ', '.join(t.name for t in tables)
+                )
+            ))
+        else:
+            for table in tables:
+                db.session.execute(table.delete())
         db.session.commit()
+        _invalidate_questions_cache()
         return True, []
     except Exception as e:
         db.session.rollback()